@@ -5,6 +5,27 @@ Context manager and local wrapper for giacsettings.
 from sagemath_giac.giac import giacsettings, libgiac
 
 
+def _giacsettings_snapshot():
+    r"""
+    Return the current ``proba_epsilon`` and ``threads`` settings of giac.
+
+    Both are taken from a single ``cas_setup()`` evaluation, while
+    reading ``giacsettings.proba_epsilon`` and ``giacsettings.threads``
+    evaluates it once for each.
+
+    EXAMPLES::
+
+        >>> from sagemath_giac.context import _giacsettings_snapshot
+        >>> from sagemath_giac.giac import giacsettings
+        >>> _giacsettings_snapshot() == (giacsettings.proba_epsilon, giacsettings.threads)
+        True
+
+    """
+    # Same positions as in the GiacSetting properties
+    setup = giacsettings.cas_setup()
+    return setup[5][1]._double, setup[7][0]._val
+
+
 class GiacSettingsDefaultContext:
     r"""
     Context preserve libgiac settings.
@@ -22,8 +43,7 @@ class GiacSettingsDefaultContext:
            True
 
         """
-        self.proba_epsilon = giacsettings.proba_epsilon
-        self.threads = giacsettings.threads
+        self.proba_epsilon, self.threads = _giacsettings_snapshot()
         # Change the debug level at the end to not have messages at each modification
         self.debuginfolevel = libgiac('debug_infolevel()')
 
@@ -39,10 +59,15 @@ class GiacSettingsDefaultContext:
            False
         """
         # Restore the debug level first to not have messages at each modification
-        libgiac('debug_infolevel')(self.debuginfolevel)
+        if libgiac('debug_infolevel()') != self.debuginfolevel:
+            libgiac('debug_infolevel')(self.debuginfolevel)
         # NB: giacsettings.epsilon has a different meaning that giacsettings.proba_epsilon.
-        giacsettings.proba_epsilon = self.proba_epsilon
-        giacsettings.threads = self.threads
+        # Only write the settings that changed: each write is a giac evaluation.
+        proba_epsilon, threads = _giacsettings_snapshot()
+        if proba_epsilon != self.proba_epsilon:
+            giacsettings.proba_epsilon = self.proba_epsilon
+        if threads != self.threads:
+            giacsettings.threads = self.threads
 
 
 def local_giacsettings(func):
@@ -37,15 +37,24 @@ Compute and verify a Groebner basis::
 #                  https://www.gnu.org/licenses/
 # *****************************************************************************
 
-from sage.structure.proof.all import polynomial as proof_polynomial
-from sage.rings.polynomial.multi_polynomial_sequence import PolynomialSequence
-from sagemath_giac.context import local_giacsettings
-from sagemath_giac.giac import giacsettings, libgiac
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+
+from sagemath_giac.context import _giacsettings_snapshot
+from sagemath_giac.giac import eval_generation, giacsettings, libgiac, Pygen
+
+# (eval_generation(), names that have a meaning in giac)
+_giac_blacklist_cache = (None, frozenset())
+
+# ring -> (giac blacklist, names of the ring conflicting with it)
+_conflicts_cache = WeakKeyDictionary()
+
+# ring -> (giac term order, names of the variables passed to giac)
+_order_cache = WeakKeyDictionary()
 
 
-@local_giacsettings
 def groebner_basis(gens, proba_epsilon=None, threads=None, prot=False,
-                   elim_variables=None, *args, **kwds):
+                   elim_variables=None, *args, parallel=False, **kwds):
     r"""
     Compute a Groebner Basis of an ideal using ``giacpy_sage``. The result is
     automatically converted to sage.
@@ -86,8 +95,21 @@ def groebner_basis(gens, proba_epsilon=None, threads=None, prot=False,
           elimination ideal with respect to a ``degrevlex`` term order is
           computed, regardless of the term order of the polynomial ring.
 
+    - ``parallel`` -- boolean (default: ``False``); if ``True`` and
+      ``elim_variables`` is given, the generators are split into groups
+      with no common variable, and the elimination ideals of the groups
+      are computed in separate processes. ``threads`` is then the maximal
+      number of processes, and each of them runs giac with one thread.
+      The processes are started with the ``spawn`` method, so they do not
+      inherit the state of this giac session but must import Sage first.
+      ``prot`` is passed on to these processes. Nothing changes when
+      there is only one group or only one process allowed.
+
     OUTPUT: polynomial sequence of the reduced Groebner basis
 
+    The last results are cached, so repeated calls with the same
+    generators and parameters do not call giac again.
+
     EXAMPLES::
 
         >>> from sage.arith.misc import previous_prime
@@ -114,6 +136,18 @@ def groebner_basis(gens, proba_epsilon=None, threads=None, prot=False,
         >>> B.ideal() == I.elimination_ideal([P.gen(0), P.gen(2)])
         True
 
+    When the generators split into groups with disjoint sets of
+    variables, each group can be handled in its own process::
+
+        >>> P = PolynomialRing(GF(previous_prime(2**31)), 6, 'x')
+        >>> x0, x1, x2, x3, x4, x5 = P.gens()
+        >>> L = [x0 - x1**2, x1 - x2**3, x3 - x4**2, x4*x5 - 1]
+        >>> B = gb_giac(L, elim_variables=[x1, x4], threads=2, parallel=True)
+        >>> B.ideal() == P.ideal(L).elimination_ideal([x1, x4])
+        True
+        >>> gb_giac(L, elim_variables=[x1, x4], threads=2, parallel=True) is B
+        True
+
     Computations over QQ can benefit from a probabilistic lifting::
 
         >>> from sage.rings.rational_field import QQ
@@ -157,6 +191,10 @@ def groebner_basis(gens, proba_epsilon=None, threads=None, prot=False,
         >>> I = Ideal(P(0),P(0))
         >>> I.groebner_basis() == gb_giac(I)
         True
+        >>> gb_giac(g for g in [P(0), P(0)])
+        [0]
+        >>> gb_giac([P.gen(0)**2 - 1, 0])
+        [x0^2 - 1]
 
     Test the supported term orderings::
 
@@ -181,74 +219,422 @@ def groebner_basis(gens, proba_epsilon=None, threads=None, prot=False,
         iter(gens)
     except TypeError:
         gens = gens.gens()
+    gens = tuple(gens)
 
     # get the ring from gens
-    P = next(iter(gens)).parent()
+    P = gens[0].parent()
+    gens = tuple(P(g) for g in gens)
     K = P.base_ring()
     p = K.characteristic()
 
     # check if the ideal is zero. (giac 1.2.0.19 segfault)
-    from sage.rings.ideal import Ideal
-    if (Ideal(gens)).is_zero():
-        return PolynomialSequence([P(0)], P, immutable=True)
+    if all(g.is_zero() for g in gens):
+        return _zero_basis(P)
 
     # check for name confusions
-    blackgiacconstants = ['i', 'e'] # NB e^k is expanded to exp(k)
-    blacklist = blackgiacconstants + [str(j) for j in libgiac.VARS()]
-    problematicnames = sorted(set(P.gens_dict()).intersection(blacklist))
+    problematicnames = _giac_conflicts(P)
 
     if problematicnames:
-        raise ValueError("Variables names %s conflict in giac. Change them or purge them from in giac with libgiac.purge(\'%s\')"
-                         % (problematicnames, problematicnames[0]))
+        raise ValueError(f"Variables names {problematicnames} conflict in giac. Change them or purge them from in giac with libgiac.purge('{problematicnames[0]}')")
 
-    if K.is_prime_field() and p == 0:
-        F = libgiac(gens)
-    elif K.is_prime_field() and p < 2**31:
-        F = (libgiac(gens) % p)
-    else:
+    if not K.is_prime_field() or p >= 2**31:
         raise NotImplementedError("Only prime fields of cardinal < 2^31 are implemented in Giac for Groebner bases.")
 
     # proof or probabilistic reconstruction
     if proba_epsilon is None:
+        from sage.structure.proof.all import polynomial as proof_polynomial
         if proof_polynomial():
-            giacsettings.proba_epsilon = 0
+            proba_epsilon = 0
         else:
-            giacsettings.proba_epsilon = 1e-15
+            proba_epsilon = 1e-15
+
+    if elim_variables is not None:
+        elim_variables = tuple(elim_variables)
+
+        if parallel:
+            components = _independent_components(gens, elim_variables)
+            if components is not None:
+                if threads is None:
+                    workers = giacsettings.threads
+                else:
+                    workers = threads
+                workers = min(workers, len(components))
+                # a single worker process is slower than computing here
+                if workers > 1:
+                    compute = (_parallel_eliminate.__wrapped__ if prot
+                               else _parallel_eliminate)
+                    return compute(P, components, proba_epsilon, workers,
+                                   prot)
+
+    # the detailed information is only printed if giac is actually called
+    compute = _groebner_basis.__wrapped__ if prot else _groebner_basis
+    generation = eval_generation()
+    try:
+        return compute(P, gens, proba_epsilon, threads, prot,
+                       elim_variables)
+    finally:
+        # the computation does not assign any giac variable
+        _giac_blacklist_unchanged(generation)
+
+
+def _independent_components(gens, elim_variables):
+    r"""
+    Split ``gens`` into groups of polynomials with pairwise disjoint
+    sets of variables.
+
+    OUTPUT:
+
+    A tuple of pairs ``(polynomials, variables to eliminate)``, one for
+    each group, or ``None`` if there is only one group or if there is
+    nothing to eliminate in some group.
+
+    EXAMPLES::
+
+        >>> from sagemath_giac.gb import _independent_components
+        >>> from sage.rings.polynomial.polynomial_ring_constructor import PolynomialRing
+        >>> from sage.rings.rational_field import QQ
+        >>> x, y, z, t = PolynomialRing(QQ, 'x,y,z,t').gens()
+        >>> _independent_components((x*y, z - t, y - 1), (x, z))
+        (((z - t,), (z,)), ((x*y, y - 1), (x,)))
+        >>> _independent_components((x*y, z - t, y - 1), (x,)) is None
+        True
+        >>> _independent_components((x*y, y*z - t), (x, z)) is None
+        True
+
+    """
+    groups = []
+    for g in gens:
+        variables = set(g.variables())
+        polynomials = [g]
+        disjoint_groups = []
+        for group_variables, group_polynomials in groups:
+            if variables.isdisjoint(group_variables):
+                disjoint_groups.append((group_variables, group_polynomials))
+            else:
+                variables |= group_variables
+                polynomials = group_polynomials + polynomials
+        groups = disjoint_groups + [(variables, polynomials)]
+
+    if len(groups) < 2:
+        return None
+
+    components = []
+    for variables, polynomials in groups:
+        elim = tuple(v for v in elim_variables if v in variables)
+        if not elim:
+            return None
+        components.append((tuple(polynomials), elim))
+    return tuple(components)
+
+
+def _eliminate_component(gens, proba_epsilon, prot, elim_variables):
+    r"""
+    Compute the elimination ideal of one group of generators.
+
+    This runs in a worker process of :func:`_parallel_eliminate`.
+    """
+    return list(groebner_basis(gens, proba_epsilon, threads=1, prot=prot,
+                               elim_variables=elim_variables))
+
+
+@lru_cache(maxsize=128)
+def _parallel_eliminate(P, components, proba_epsilon, workers, prot):
+    r"""
+    Compute the elimination ideal of the sum of the ideals given by
+    ``components`` (see :func:`_independent_components`) in at most
+    ``workers`` processes.
+
+    The groups have no common variable, so the union of their reduced
+    Groebner bases is the reduced Groebner basis of the whole
+    elimination ideal, unless one of them is the unit ideal.
+
+    Like those of :func:`_groebner_basis`, the results are cached.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+    from sage.rings.polynomial.multi_polynomial_sequence import PolynomialSequence
+
+    # Do not fork a process that has been running giac's threads
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=get_context('spawn')) as executor:
+        futures = [executor.submit(_eliminate_component, polynomials,
+                                   proba_epsilon, prot, elim)
+                   for polynomials, elim in components]
+        bases = [future.result() for future in futures]
+
+    basis = []
+    for B in bases:
+        for g in B:
+            if g.is_zero():
+                continue
+            if g.is_constant():
+                return PolynomialSequence([P(1)], P, immutable=True)
+            basis.append(g)
+
+    if not basis:
+        return _zero_basis(P)
+    return PolynomialSequence(basis, P, immutable=True)
+
+
+@lru_cache(maxsize=128)
+def _zero_basis(P):
+    r"""
+    Return the Groebner basis of the zero ideal of ``P``.
+
+    EXAMPLES::
+
+        >>> from sagemath_giac.gb import _zero_basis
+        >>> from sage.rings.polynomial.polynomial_ring_constructor import PolynomialRing
+        >>> from sage.rings.rational_field import QQ
+        >>> P = PolynomialRing(QQ, 'x,y')
+        >>> _zero_basis(P)
+        [0]
+        >>> _zero_basis(P) is _zero_basis(P)
+        True
+
+    """
+    from sage.rings.polynomial.multi_polynomial_sequence import PolynomialSequence
+    return PolynomialSequence([P(0)], P, immutable=True)
+
+
+def _giac_blacklist():
+    r"""
+    Return the set of the names that have a meaning in giac: some
+    constants and the variables assigned in giac.
+
+    ``VARS()`` is only called again when giac has evaluated something
+    since the last call.
+
+    EXAMPLES::
+
+        >>> from sagemath_giac.gb import _giac_blacklist
+        >>> from sagemath_giac.giac import libgiac
+        >>> 'e' in _giac_blacklist(), 'whywouldyou' in _giac_blacklist()
+        (True, False)
+        >>> libgiac('whywouldyou:=1')
+        1
+        >>> 'whywouldyou' in _giac_blacklist()
+        True
+        >>> libgiac.purge('whywouldyou')
+        1
+        >>> 'whywouldyou' in _giac_blacklist()
+        False
+
+    """
+    global _giac_blacklist_cache
+    generation, blacklist = _giac_blacklist_cache
+    if generation != eval_generation():
+        blackgiacconstants = ['i', 'e'] # NB e^k is expanded to exp(k)
+        blacklist = frozenset(blackgiacconstants).union(
+            str(j) for j in libgiac.VARS())
+        _giac_blacklist_cache = (eval_generation(), blacklist)
+    return blacklist
+
+
+def _giac_blacklist_unchanged(generation):
+    r"""
+    Keep the cached giac blacklist valid after evaluations that are
+    known not to assign any variable, starting at ``generation``.
+    """
+    global _giac_blacklist_cache
+    if _giac_blacklist_cache[0] == generation:
+        _giac_blacklist_cache = (eval_generation(), _giac_blacklist_cache[1])
+
+
+def _giac_conflicts(P):
+    r"""
+    Return the sorted list of the variable names of ``P`` that have
+    a meaning in giac.
+
+    EXAMPLES::
+
+        >>> from sagemath_giac.gb import _giac_conflicts
+        >>> from sage.rings.polynomial.polynomial_ring_constructor import PolynomialRing
+        >>> from sage.rings.rational_field import QQ
+        >>> _giac_conflicts(PolynomialRing(QQ, 'e,x,i'))
+        ['e', 'i']
+
+    """
+    blacklist = _giac_blacklist()
+    try:
+        cached_blacklist, conflicts = _conflicts_cache[P]
+    except KeyError:
+        pass
     else:
-        giacsettings.proba_epsilon = proba_epsilon
+        if cached_blacklist is blacklist:
+            return conflicts
 
-    # prot
-    if prot:
-        libgiac('debug_infolevel(2)')
+    conflicts = sorted(blacklist.intersection(P.variable_names()))
+    _conflicts_cache[P] = (blacklist, conflicts)
+    return conflicts
 
-    # threads
-    if threads is not None:
-        giacsettings.threads = threads
+
+@lru_cache(maxsize=128)
+def _groebner_basis(P, gens, proba_epsilon, threads, prot, elim_variables):
+    r"""
+    Compute the Groebner basis of ``gens`` with giac.
+
+    The arguments are those of :func:`groebner_basis` once they have
+    been checked and normalized: ``P`` is the parent of the tuple of
+    polynomials ``gens``, ``proba_epsilon`` is a number and
+    ``elim_variables`` is ``None`` or a tuple of variables.
+
+    Results are cached, so that calling :func:`groebner_basis` again
+    on the same ideal returns the same (immutable) sequence::
+
+        >>> from sagemath_giac.gb import groebner_basis as gb_giac
+        >>> from sage.rings.ideal import Cyclic as CyclicIdeal
+        >>> from sage.rings.polynomial.polynomial_ring_constructor import PolynomialRing
+        >>> from sage.rings.rational_field import QQ
+        >>> P = PolynomialRing(QQ, 4, 'x')
+        >>> I = CyclicIdeal(P)
+        >>> gb_giac(I) is gb_giac(I)
+        True
+        >>> gb_giac(I) is gb_giac(I, proba_epsilon=1e-16)
+        False
+
+    The giac settings are only changed during the computation::
+
+        >>> from sagemath_giac.giac import giacsettings
+        >>> settings = (giacsettings.proba_epsilon, giacsettings.threads)
+        >>> B = gb_giac(I, proba_epsilon=1e-20, threads=settings[1] + 1)
+        >>> (giacsettings.proba_epsilon, giacsettings.threads) == settings
+        True
+
+    """
+    from sage.rings.polynomial.multi_polynomial_sequence import PolynomialSequence
 
     if elim_variables is None:
-        var_names = P.variable_names()
-        order_name = P.term_order().name()
-        if order_name == "degrevlex":
-            giac_order = "revlex"
-        elif order_name == "lex":
-            giac_order = "plex"
-        elif order_name == "deglex":
-            giac_order = "tdeg"
+        giac_order, var_names = _giac_order(P)
+
+    F = _giac_generators(gens, P.characteristic())
+
+    # change the giac settings for this computation only
+    old_proba_epsilon, old_threads = _giacsettings_snapshot()
+    proba_epsilon_changed = threads_changed = debuginfolevel_changed = False
+
+    try:
+        if old_proba_epsilon != proba_epsilon:
+            proba_epsilon_changed = True
+            giacsettings.proba_epsilon = proba_epsilon
+
+        # threads
+        if threads is not None and old_threads != threads:
+            threads_changed = True
+            giacsettings.threads = threads
+
+        # prot
+        if prot:
+            old_debuginfolevel = libgiac('debug_infolevel()')
+            debuginfolevel_changed = True
+            libgiac('debug_infolevel(2)')
+
+        if elim_variables is None:
+            # compute de groebner basis with giac
+            gb_giac = F.gbasis(_giac_variables(var_names), giac_order)
         else:
-            blocks = P.term_order().blocks()
-            if (len(blocks) == 2 and
-                    all(order.name() == "degrevlex" for order in blocks)):
-                giac_order = "revlex"
-                var_names = var_names[:len(blocks[0])]
-            else:
-                raise NotImplementedError(
-                        "%s is not a supported term order in "
-                        "Giac Groebner bases." % P.term_order())
+            elim_names = tuple(str(v) for v in elim_variables)
+            gb_giac = F.eliminate(_giac_variables(elim_names), 'gbasis')
+    finally:
+        # Restore the debug level first to not have messages at each modification
+        if debuginfolevel_changed:
+            libgiac('debug_infolevel')(old_debuginfolevel)
+        if proba_epsilon_changed:
+            giacsettings.proba_epsilon = old_proba_epsilon
+        if threads_changed:
+            giacsettings.threads = old_threads
+
+    return PolynomialSequence(gb_giac, P, immutable=True)
 
-        # compute de groebner basis with giac
-        gb_giac = F.gbasis(list(var_names), giac_order)
 
+def _giac_order(P):
+    r"""
+    Return the giac term order corresponding to the term order of ``P``
+    and the names of the variables to pass to giac.
+
+    EXAMPLES::
+
+        >>> from sagemath_giac.gb import _giac_order
+        >>> from sage.rings.polynomial.polynomial_ring_constructor import PolynomialRing
+        >>> from sage.rings.rational_field import QQ
+        >>> _giac_order(PolynomialRing(QQ, 'x', 4, order='lex'))
+        ('plex', ('x0', 'x1', 'x2', 'x3'))
+        >>> _giac_order(PolynomialRing(QQ, 'x', 4, order='degrevlex(1),degrevlex(3)'))
+        ('revlex', ('x0',))
+        >>> _giac_order(PolynomialRing(QQ, 'x', 4, order='neglex'))
+        Traceback (most recent call last):
+        ...
+        NotImplementedError: Negative lexicographic term order is not a supported term order in Giac Groebner bases.
+
+    """
+    try:
+        return _order_cache[P]
+    except KeyError:
+        pass
+
+    var_names = P.variable_names()
+    order_name = P.term_order().name()
+    if order_name == "degrevlex":
+        giac_order = "revlex"
+    elif order_name == "lex":
+        giac_order = "plex"
+    elif order_name == "deglex":
+        giac_order = "tdeg"
     else:
-        gb_giac = F.eliminate(list(elim_variables), 'gbasis')
+        blocks = P.term_order().blocks()
+        if (len(blocks) == 2 and
+                all(order.name() == "degrevlex" for order in blocks)):
+            giac_order = "revlex"
+            var_names = var_names[:len(blocks[0])]
+        else:
+            raise NotImplementedError(
+                    "%s is not a supported term order in "
+                    "Giac Groebner bases." % P.term_order())
 
-    return PolynomialSequence(gb_giac, P, immutable=True)
+    _order_cache[P] = giac_order, var_names
+    return giac_order, var_names
+
+
+@lru_cache(maxsize=128)
+def _giac_variables(names):
+    r"""
+    Return the giac list of the variables ``names``.
+
+    The list is parsed once and shared by all the rings with these
+    variable names, and by the elimination ideals with these variables.
+
+    EXAMPLES::
+
+        >>> from sagemath_giac.gb import _giac_variables
+        >>> _giac_variables(('x0', 'x1', 'x2'))
+        [x0,x1,x2]
+
+    """
+    return Pygen("[%s]" % ",".join(names))
+
+
+@lru_cache(maxsize=128)
+def _giac_generators(gens, p):
+    r"""
+    Return the giac list of the polynomials ``gens``, reduced modulo ``p``
+    if ``p`` is nonzero.
+
+    The polynomials are sent to giac as a single string, which is parsed
+    once. The giac object is cached to be reused by later computations
+    on the same generators::
+
+        >>> from sagemath_giac.gb import _giac_generators
+        >>> from sage.rings.polynomial.polynomial_ring_constructor import PolynomialRing
+        >>> from sage.rings.rational_field import QQ
+        >>> x, y = PolynomialRing(QQ, 'x,y').gens()
+        >>> _giac_generators((x**2 + 3, x*y - 1), 0)
+        [x^2+3,x*y-1]
+        >>> _giac_generators((x**2 + 3, x*y - 1), 0) is _giac_generators((x**2 + 3, x*y - 1), 0)
+        True
+
+    """
+    F = "[%s]" % ",".join(str(g) for g in gens)
+    if p:
+        # reduce in the same evaluation instead of building a second object
+        F = "%s %% %s" % (F, p)
+    return libgiac(F)
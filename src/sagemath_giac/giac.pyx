@@ -173,6 +173,32 @@ def encstring23(s):
 ########################################################
 cdef context * context_ptr = new context()
 
+# Incremented each time giac evaluates something. Evaluations are the
+# only way to change the giac state (variables, settings...), so caches
+# of that state are valid as long as this number does not change.
+cdef unsigned long long _eval_generation = 0
+
+
+def eval_generation():
+    """
+    Return a number that changes each time giac evaluates something.
+
+    EXAMPLES::
+
+        >>> from sagemath_giac.giac import eval_generation, libgiac
+        >>> n = eval_generation()
+        >>> eval_generation() == n
+        True
+        >>> libgiac('a:=1')
+        1
+        >>> eval_generation() == n
+        False
+        >>> libgiac.purge('a')
+        1
+
+    """
+    return _eval_generation
+
 # Some global variables for optimisation
 GIACNULL = Pygen('NULL')
 
@@ -1042,7 +1068,9 @@ cdef class Pygen(GiacMethods_base):
             yield self[i]
 
     def eval(self):
+        global _eval_generation
         cdef gen result
+        _eval_generation += 1
         sig_on()
         result = GIAC_protecteval(self.gptr[0],giacsettings.eval_level,context_ptr)
         sig_off()
@@ -1062,10 +1090,12 @@ cdef class Pygen(GiacMethods_base):
         return _wrap_gen(result)
 
     def __call__(self, *args):
+        global _eval_generation
         cdef gen result
         cdef Pygen pari_unlock = Pygen('pari_unlock()')
         cdef gen pari_unlock_result
         cdef Pygen right
+        _eval_generation += 1
         n = len(args)
         if n > 1:
             # FIXME? improve with a vector, or improve Pygen(list)
@@ -1722,7 +1752,9 @@ cdef class Pygen(GiacMethods_base):
         return _wrap_gen(result)
 
     def giacifactor(self, *args):
+        global _eval_generation
         cdef gen result
+        _eval_generation += 1
         sig_on()
         result = GIAC_eval(self.gptr[0], <int>1, context_ptr)
         result = GIAC_ifactor(result, context_ptr)